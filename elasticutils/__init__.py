@@ -1,5 +1,7 @@
 from .elastic_client import ElasticsearchClient
+from .async_elastic_client import AsyncElasticsearchClient
 from .elastic_urls import ElasticUrls
 from .query_builder import ElasticQueryBuilder
+from .result_cache import ResultCache
 
-__all__ = ["ElasticsearchClient", "ElasticUrls", "ElasticQueryBuilder"]
\ No newline at end of file
+__all__ = ["ElasticsearchClient", "AsyncElasticsearchClient", "ElasticUrls", "ElasticQueryBuilder", "ResultCache"]
\ No newline at end of file
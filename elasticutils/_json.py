@@ -0,0 +1,31 @@
+"""
+JSON helpers that use orjson when it is installed and fall back to the
+standard library otherwise. dumps always returns compact UTF-8 bytes.
+"""
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def _stdlib_dumps(obj, sort_keys: bool = False) -> bytes:
+    return json.dumps(obj, separators=(",", ":"), sort_keys=sort_keys).encode()
+
+
+if orjson is not None:
+    def dumps(obj, sort_keys: bool = False) -> bytes:
+        option = orjson.OPT_NON_STR_KEYS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        try:
+            return orjson.dumps(obj, option=option)
+        except TypeError:
+            # orjson rejects some values json accepts, such as integers above 64 bits
+            return _stdlib_dumps(obj, sort_keys=sort_keys)
+
+    loads = orjson.loads
+else:
+    dumps = _stdlib_dumps
+    loads = json.loads
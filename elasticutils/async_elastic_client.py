@@ -0,0 +1,215 @@
+import base64
+from typing import Dict, Any, AsyncIterator, Optional, Tuple
+
+from ._json import loads
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - optional dependency
+    aiohttp = None
+
+
+class AsyncElasticsearchClient:
+    """
+    An asyncio client for issuing many concurrent requests to Elasticsearch
+    from a single thread.
+
+    The client owns one aiohttp.ClientSession which is opened when entering
+    the context manager and closed when leaving it. Create the client once and
+    reuse it for all requests; creating a client per request leaks connectors
+    and loses connection reuse.
+
+    Example:
+        async with AsyncElasticsearchClient("http://localhost:9200", "user", "pass") as client:
+            results = await asyncio.gather(*(client.search("my_index", q) for q in queries))
+    """
+    connection_limit = 64
+
+    def __init__(
+        self,
+        base_url: str,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        token: Optional[str] = None,
+    ):
+        if aiohttp is None:
+            raise ImportError(
+                "AsyncElasticsearchClient requires aiohttp, install it with 'pip install elasticutils[async]'"
+            )
+        self.base_url = base_url
+        self._base_url_prefix = base_url.rstrip("/") + "/"
+        if token is None:
+            if username is None or password is None:
+                raise ValueError("Either 'token' or both 'username' and 'password' must be provided")
+            credentials = f"{username}:{password}"
+            token = base64.b64encode(credentials.encode()).decode()
+        self.headers = {
+            "Authorization": f"Basic {token}",
+            "Content-Type": "application/json",
+        }
+        self._session = None
+
+    @classmethod
+    def from_token(cls, base_url: str, token: str) -> "AsyncElasticsearchClient":
+        """
+        Create a client from an already base64 encoded basic auth token, skipping
+        the credential encoding.
+
+        Args:
+            base_url: The base URL of the Elasticsearch instance
+            token: The base64 encoded "username:password" token
+
+        Returns:
+            AsyncElasticsearchClient: The client
+        """
+        return cls(base_url, token=token)
+
+    async def __aenter__(self) -> "AsyncElasticsearchClient":
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.connection_limit, ssl=False),
+            headers=self.headers,
+        )
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """
+        Close the underlying session and release its connections.
+        """
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __send_request(self, method: str, url: str, data=None, allowed_statuses=()) -> Dict[str, Any]:
+        """
+        Send a request to Elasticsearch and return the decoded response body.
+
+        Error statuses raise aiohttp.ClientResponseError, except the ones in
+        allowed_statuses whose bodies are decoded and returned.
+        """
+        if self._session is None:
+            raise RuntimeError("AsyncElasticsearchClient must be used with 'async with'")
+        # check if url is not a valid then attach the base url
+        if url[:4] != "http":
+            url = self._base_url_prefix + url.lstrip("/")
+        async with self._session.request(method, url, json=data) as response:
+            if response.status not in allowed_statuses:
+                response.raise_for_status()
+            return await response.json(loads=loads)
+
+    async def get_document(self, index: str, doc_id: str) -> Dict[str, Any]:
+        """
+        Get a document by its ID.
+
+        Args:
+            index: The name of the index
+            doc_id: The document ID
+
+        Returns:
+            dict: The response from Elasticsearch, a missing document gives
+                "found": False like ElasticsearchClient.get_document
+        """
+        return await self.__send_request("GET", f"{index}/_doc/{doc_id}", allowed_statuses=(404,))
+
+    async def search(self, index: str, query: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Execute a search query on the specified index.
+
+        Args:
+            index: The name of the index to search
+            query: The search query to execute
+
+        Returns:
+            dict: The response from Elasticsearch
+        """
+        return await self.__send_request("POST", f"{index}/_search", data=query)
+
+    async def create_point_in_time(self, index: str, keep_alive: str = "1m") -> Dict[str, Any]:
+        """
+        Create a Point in Time (PIT) for an index.
+
+        Args:
+            index: The name of the index
+            keep_alive: The duration for which the PIT should be kept alive
+
+        Returns:
+            dict: The response from Elasticsearch
+        """
+        return await self.__send_request(
+            "POST", f"{index}/_search/point_in_time?keep_alive={keep_alive}"
+        )
+
+    async def delete_point_in_time(self, pit_id) -> Dict[str, Any]:
+        """
+        Delete a Point in Time (PIT) to release resources.
+
+        Args:
+            pit_id (str or list): The ID or list of IDs of the point in time to delete.
+
+        Returns:
+            dict: The response from Elasticsearch
+        """
+        pit_ids = [pit_id] if isinstance(pit_id, str) else pit_id
+        return await self.__send_request(
+            "DELETE", "_search/point_in_time", data={"pit_id": pit_ids}
+        )
+
+    async def search_with_pit(
+        self,
+        pit_id: str,
+        query,
+        batch_size=10000,
+        max_records=100000,
+        fields=[],
+        initial_search_after=None,
+    ) -> AsyncIterator[Tuple[Dict[str, Any], Any]]:
+        """
+        Iterate over the results of a query using a Point in Time and search_after.
+
+        Args:
+            pit_id: The ID of the point in time
+            query: The query to execute
+            batch_size: The number of hits to fetch per request
+            max_records: The maximum number of hits to fetch in total
+            fields: The source fields to return
+            initial_search_after: The sort value to resume the search from
+
+        Returns:
+            async generator: Yields (source, search_after) tuples
+
+        Example:
+            async for source, search_after in client.search_with_pit(pit_id, query):
+                ...
+        """
+        total_fetched = 0
+        search_after = initial_search_after
+
+        # the static part of the body is built once, only size and search_after change per batch
+        body = {
+            "track_total_hits": True,
+            "query": query,
+            "pit": {"id": pit_id, "keep_alive": "1m"},
+            "sort": [{"timestamp": {"order": "desc"}}],
+        }
+        if fields:
+            body["_source"] = fields
+
+        while total_fetched < max_records:
+            body["size"] = min(batch_size, max_records - total_fetched)
+            if search_after:
+                body["search_after"] = search_after
+
+            data = await self.__send_request("POST", "_search", data=body)
+
+            hits = data.get("hits", {}).get("hits", [])
+            if not hits:
+                break
+
+            for hit in hits:
+                # each hit carries its own sort value, the last one is where the next batch starts
+                search_after = hit["sort"]
+                yield (hit["_source"], search_after)
+
+            total_fetched += len(hits)
@@ -1,52 +1,354 @@
 import base64
+import gzip
+import socket
+import ssl
+import time
 import requests
-from typing import Dict, Any
+import urllib3
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3.util.retry import Retry
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+
+from ._json import dumps, loads
+from .result_cache import ResultCache
+
+try:
+    import ijson
+except ImportError:  # pragma: no cover - optional dependency
+    ijson = None
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - optional dependency
+    httpx = None
+
+# disable Nagle so small search bodies are sent immediately and keep idle pooled connections alive
+SOCKET_OPTIONS = [
+    (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),
+    (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+]
+
+
+class _ElasticRetry(Retry):
+    """
+    Retry idempotent methods on 429, 502, 503 and 504, and POST only on 429.
+    A 429 means Elasticsearch rejected the whole request before applying it,
+    so `_bulk` and `_search` can safely be resent. A POST that failed with a
+    gateway error may already have been applied, so it is not retried.
+    """
+    def is_retry(self, method, status_code, has_retry_after=False):
+        if method.upper() == "POST":
+            return bool(self.total) and status_code == 429
+        return super().is_retry(method, status_code, has_retry_after)
+
+
+class _ElasticHTTPAdapter(HTTPAdapter):
+    """
+    An HTTPAdapter whose connection pools share one preconfigured SSLContext and
+    the SOCKET_OPTIONS tuning.
+    The adapter owns certificate verification, so the verify value of a request
+    (or of REQUESTS_CA_BUNDLE in the environment) does not override it.
+    """
+    def __init__(self, ssl_context: ssl.SSLContext, verify: bool, **kwargs):
+        self.ssl_context = ssl_context
+        self.verify = verify
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        kwargs["verify"] = self.verify
+        return super().send(request, **kwargs)
+
+    def cert_verify(self, conn, url, verify, cert):
+        # the shared ssl_context already holds the trust store, so no CA file is
+        # handed to urllib3 to reload into it on every new connection
+        super().cert_verify(conn, url, verify, cert)
+        conn.ca_certs = None
+        conn.ca_cert_dir = None
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs["ssl_context"] = self.ssl_context
+        kwargs["socket_options"] = SOCKET_OPTIONS
+        return super().init_poolmanager(*args, **kwargs)
+
+    def proxy_manager_for(self, *args, **kwargs):
+        kwargs["ssl_context"] = self.ssl_context
+        kwargs["socket_options"] = SOCKET_OPTIONS
+        return super().proxy_manager_for(*args, **kwargs)
+
 
 class ElasticsearchClient:
     base_url = None
     headers = None
-    def __init__(self, base_url: str, username: str, password: str):
-        ElasticsearchClient.base_url = base_url
-        credentials = f"{username}:{password}"
-        token = base64.b64encode(credentials.encode()).decode()
-        ElasticsearchClient.headers = {
+    pool_size = 32
+    _METHODS = {"get": "GET", "post": "POST", "put": "PUT", "delete": "DELETE"}
+    def __init__(
+        self,
+        base_url: str,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        compress_threshold: int = 4096,
+        result_cache: Optional[ResultCache] = None,
+        ca_bundle: Optional[str] = None,
+        token: Optional[str] = None,
+        http2: bool = False,
+    ):
+        if http2 and httpx is None:
+            raise ImportError(
+                "http2 requires httpx, install it with 'pip install elasticutils[http2]'"
+            )
+        self.base_url = base_url
+        # certificates are only verified when a CA bundle is given
+        self.ca_bundle = ca_bundle
+        self._base_url_prefix = base_url.rstrip("/") + "/"
+        # search and get_document results are served from this cache when set
+        self.result_cache = result_cache
+        # request bodies of at least this many bytes are gzipped, None disables compression
+        self.compress_threshold = compress_threshold
+        if token is None:
+            if username is None or password is None:
+                raise ValueError("Either 'token' or both 'username' and 'password' must be provided")
+            credentials = f"{username}:{password}"
+            token = base64.b64encode(credentials.encode()).decode()
+        self.headers = {
             "Authorization": f"Basic {token}",
             "Content-Type": "application/json",
+            "Accept-Encoding": "gzip, deflate",
         }
-
-    def get_document(self, index: str, doc_id: str) -> Dict[str, Any]:
-        url = f"{self.base_url}/{index}/_doc/{doc_id}"
-        response = requests.get(url, headers=self.headers, verify=False)
-        return response.json()
+        ssl_context = self.__create_ssl_context()
+        # one retry policy is shared by the requests adapter and the httpx transport
+        self._retry = _ElasticRetry(
+            total=3,
+            backoff_factor=0.2,
+            status_forcelist=[429, 502, 503, 504],
+            # once retries run out return the last response, like an unretried request
+            raise_on_status=False,
+        )
+        # the session carries these headers, so individual requests only add what differs
+        self._session = self.__create_session(ssl_context)
+        # when enabled, requests are multiplexed over HTTP/2 connections by httpx instead
+        self._hx = self.__create_http2_client(ssl_context) if http2 else None
 
     @classmethod
-    def __send_request(cls, method, url, **kwargs) -> requests.Response:
+    def from_token(cls, base_url: str, token: str, **kwargs) -> "ElasticsearchClient":
+        """
+        Create a client from an already base64 encoded basic auth token, skipping
+        the credential encoding.
+        Args:
+            base_url (str): The base URL of the Elasticsearch instance
+            token (str): The base64 encoded "username:password" token
+            **kwargs: Additional keyword arguments passed to the constructor
+        Returns:
+            ElasticsearchClient: The client
+        Example:
+            client = ElasticsearchClient.from_token("http://localhost:9200", "dXNlcjpwYXNz")
+        """
+        return cls(base_url, token=token, **kwargs)
+
+    def __create_ssl_context(self) -> ssl.SSLContext:
+        """
+        Create the SSLContext shared by every connection of this client.
+        """
+        if self.ca_bundle:
+            return ssl.create_default_context(cafile=self.ca_bundle)
+        ssl_context = ssl.create_default_context()
+        ssl_context.check_hostname = False
+        ssl_context.verify_mode = ssl.CERT_NONE
+        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+        return ssl_context
+
+    def __create_session(self, ssl_context: ssl.SSLContext) -> requests.Session:
+        """
+        Create a pooled session so TCP and TLS connections are reused across requests.
+        """
+        session = requests.Session()
+        session.headers.update(self.headers)
+        adapter = _ElasticHTTPAdapter(
+            ssl_context,
+            bool(self.ca_bundle),
+            pool_connections=self.pool_size,
+            pool_maxsize=self.pool_size,
+            max_retries=self._retry,
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def __create_http2_client(self, ssl_context: ssl.SSLContext):
+        """
+        Create an httpx client that multiplexes concurrent requests over HTTP/2.
+        HTTP/2 is negotiated over TLS, plain http:// URLs fall back to HTTP/1.1.
+        The transport retries failed connections and uses the same SOCKET_OPTIONS
+        as the requests adapter, status retries are handled in __request.
+        """
+        transport = httpx.HTTPTransport(
+            http2=True,
+            verify=ssl_context,
+            limits=httpx.Limits(max_keepalive_connections=self.pool_size, max_connections=self.pool_size * 2),
+            retries=self._retry.total,
+            socket_options=SOCKET_OPTIONS,
+        )
+        return httpx.Client(transport=transport, headers=self.headers)
+
+    def close(self) -> None:
+        """
+        Close the pooled connections of this client.
+        """
+        self._session.close()
+        if self._hx is not None:
+            self._hx.close()
+
+    def __request(self, method: str, url: str, data=None, headers=None, stream: bool = False) -> requests.Response:
+        """
+        Send a request through httpx when HTTP/2 is enabled, otherwise through the requests session.
+        Either way the caller gets a requests.Response and requests exceptions.
+        """
+        if self._hx is None:
+            return self._session.request(method, url, data=data, headers=headers, stream=stream)
+        attempt = 0
+        while True:
+            try:
+                response = self._hx.request(method, url, content=data, headers=headers)
+            except httpx.TimeoutException as e:
+                raise requests.exceptions.Timeout(str(e)) from e
+            except httpx.TransportError as e:
+                raise requests.exceptions.ConnectionError(str(e)) from e
+            # apply the same status retry rules as the requests adapter
+            if attempt >= self._retry.total or not self._retry.is_retry(method, response.status_code):
+                return self.__to_requests_response(response)
+            response.close()
+            time.sleep(self._retry.backoff_factor * (2 ** attempt))
+            attempt += 1
+
+    @staticmethod
+    def __to_requests_response(response) -> requests.Response:
+        """
+        Copy an httpx response into a requests.Response so that both transports
+        offer the same interface (ok, json(), raise_for_status() and requests exceptions).
+        """
+        converted = requests.Response()
+        converted.status_code = response.status_code
+        converted.headers = CaseInsensitiveDict(response.headers)
+        converted.url = str(response.url)
+        converted.reason = response.reason_phrase
+        converted.encoding = response.encoding
+        converted._content = response.content
+        converted._content_consumed = True
+        return converted
+
+    def get_document(self, index: str, doc_id: str, cache: bool = True) -> Dict[str, Any]:
+        key = None
+        if cache and self.result_cache is not None:
+            key = ResultCache.make_key(index, "_doc", doc_id)
+            cached = self.result_cache.get(key)
+            if cached is not None:
+                # the raw body is cached so every caller gets its own decoded dict
+                return loads(cached)
+        url = f"{self._base_url_prefix}{index}/_doc/{doc_id}"
+        response = self.__request("GET", url)
+        if key is not None and response.status_code == 200:
+            self.result_cache.set(key, index, response.content)
+        return loads(response.content)
+
+    def mget(self, index: str, doc_ids: List[str], _source=None) -> List[Dict[str, Any]]:
+        """
+        Get many documents in one request through the `_mget` API.
+
+        Args:
+            index: The name of the index
+            doc_ids: The document IDs
+            _source: A field name or list of field names to return, or a bool to
+                turn the source on or off
+
+        Returns:
+            list: The documents in the same order as doc_ids, missing ones have "found": False
+        """
+        doc_ids = list(doc_ids)
+        if not doc_ids:
+            return []
+        endpoint = f"{index}/_mget"
+        if isinstance(_source, bool):
+            endpoint += "?_source=true" if _source else "?_source=false"
+        elif isinstance(_source, str):
+            endpoint += "?_source=" + _source
+        elif _source:
+            endpoint += "?_source=" + ",".join(_source)
+        response = self.post(endpoint, data={"ids": doc_ids})
+        response.raise_for_status()
+        return loads(response.content).get("docs", [])
+
+    def get_many(
+        self,
+        index: str,
+        doc_ids: List[str],
+        chunk: int = 1000,
+        thread_count: int = 8,
+        _source=None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Get a large number of documents by splitting the IDs into `_mget` requests
+        of at most chunk IDs which run concurrently over the client session.
+
+        Args:
+            index: The name of the index
+            doc_ids: The document IDs
+            chunk: The maximum number of IDs per `_mget` request
+            thread_count: The number of concurrent requests
+            _source: A field name or list of field names to return, or a bool to
+                turn the source on or off
+
+        Returns:
+            list: The documents in the same order as doc_ids
+        """
+        doc_ids = list(doc_ids)
+        chunks = [doc_ids[i:i + chunk] for i in range(0, len(doc_ids), chunk)]
+        if len(chunks) <= 1:
+            return self.mget(index, doc_ids, _source=_source)
+        docs = []
+        with ThreadPoolExecutor(max_workers=min(thread_count, len(chunks))) as executor:
+            for result in executor.map(lambda ids: self.mget(index, ids, _source=_source), chunks):
+                docs.extend(result)
+        return docs
+
+    def invalidate(self, index: Optional[str] = None) -> None:
+        """
+        Drop cached results for an index, or for every index if none is given.
+        The client calls this itself after its own writes.
+
+        Args:
+            index: The name of the index
+        """
+        if self.result_cache is not None:
+            self.result_cache.invalidate(index)
+
+    def __encode_body(self, body: bytes, content_type: str):
+        """
+        Gzip the request body when it is large enough to be worth the CPU cost.
+        Returns the body to send and the headers describing it.
+        """
+        headers = {"Content-Type": content_type}
+        if self.compress_threshold is not None and len(body) >= self.compress_threshold:
+            body = gzip.compress(body)
+            headers["Content-Encoding"] = "gzip"
+        return body, headers
+
+    def __send_request(self, method, url, **kwargs) -> requests.Response:
         """
         Send a request to Elasticsearch.
         """
         # check if url is not a valid then attach the base url
-        if not url.startswith("http"):
-            url = f"{cls.base_url}/{url}"
-        json = kwargs.get("data")
-        request = None
-        match method:
-            case "get":
-                request = requests.get
-            case "post":
-                request = requests.post
-            case "put":
-                request = requests.put
-            case "delete":
-                request = requests.delete
-            case _:
-                raise ValueError("Method not supported")
-
-        return request(
-            url=url,
-            json=json,
-            verify=False,
-            headers=cls.headers,
-        )
+        if url[:4] != "http":
+            url = self._base_url_prefix + url.lstrip("/")
+        request = self._METHODS.get(method)
+        if request is None:
+            raise ValueError("Method not supported")
+        data = kwargs.get("data")
+        headers = None
+        if data is not None:
+            data, headers = self.__encode_body(dumps(data), "application/json")
+
+        return self.__request(request, url, data=data, headers=headers, stream=kwargs.get("stream", False))
 
     def get(self, endpoint: str, **kwargs) -> requests.Response:
         """
@@ -72,19 +374,51 @@ class ElasticsearchClient:
         """
         return self.__send_request("delete", endpoint, **kwargs)
 
-    def search(self, index: str, query: Dict[str, Any], **kwargs) -> requests.Response:
+    def search(
+        self,
+        index: str,
+        query: Dict[str, Any],
+        cache: bool = True,
+        request_cache: Optional[bool] = None,
+        **kwargs,
+    ) -> requests.Response:
         """
         Execute a search query on the specified index.
+
+        By default Elasticsearch's shard request cache only stores responses of
+        size=0 searches; an explicit request_cache=True caches other responses
+        too. It pays off most for aggregation-only queries and when the
+        predicates are term, terms or range clauses in filter context.
         
         Args:
             index: The name of the index to search
             query: The search query to execute
+            cache: Whether the result cache may be used for this search
+            request_cache: Whether to use the shard request cache. Defaults to True
+                for queries with "size": 0 and for aggregation-only queries,
+                otherwise the index setting applies.
             
         Returns:
             requests.Response: The response from Elasticsearch
         """
+        key = None
+        if cache and self.result_cache is not None:
+            key = ResultCache.make_key(index, "_search", query)
+            cached = self.result_cache.get(key)
+            if cached is not None:
+                return cached
+        if request_cache is None and (
+            query.get("size") == 0
+            or (("aggs" in query or "aggregations" in query) and not query.get("query"))
+        ):
+            request_cache = True
         endpoint = f"{index}/_search"
-        return self.post(endpoint, data=query, **kwargs)
+        if request_cache is not None:
+            endpoint += "?request_cache=true" if request_cache else "?request_cache=false"
+        response = self.post(endpoint, data=query, **kwargs)
+        if key is not None and response.status_code == 200:
+            self.result_cache.set(key, index, response)
+        return response
         
     def index(self, index: str, document: Dict[str, Any], doc_id: str = None) -> requests.Response:
         """
@@ -102,7 +436,9 @@ class ElasticsearchClient:
             endpoint = f"{index}/_doc/{doc_id}"
         else:
             endpoint = f"{index}/_doc"
-        return self.post(endpoint, data=document)
+        response = self.post(endpoint, data=document)
+        self.invalidate(index)
+        return response
         
     def update(self, index: str, doc_id: str, document: Dict[str, Any]) -> requests.Response:
         """
@@ -117,8 +453,138 @@ class ElasticsearchClient:
             requests.Response: The response from Elasticsearch
         """
         endpoint = f"{index}/_update/{doc_id}"
-        return self.post(endpoint, data=document)
+        response = self.post(endpoint, data=document)
+        self.invalidate(index)
+        return response
         
+    def __bulk_chunks(
+        self,
+        index: str,
+        docs: Iterable[Dict[str, Any]],
+        chunk_size: int,
+        max_chunk_bytes: int,
+    ) -> Iterator[bytes]:
+        """
+        Encode documents as NDJSON `_bulk` bodies of at most chunk_size documents
+        and max_chunk_bytes bytes. A single document larger than max_chunk_bytes
+        is sent in a chunk of its own.
+        """
+        buf = bytearray()
+        count = 0
+        for doc in docs:
+            action = {"_index": index}
+            if "_id" in doc:
+                doc = dict(doc)
+                doc_id = doc.pop("_id")
+                if doc_id is not None:
+                    action["_id"] = doc_id
+            pair = b"%s\n%s\n" % (dumps({"index": action}), dumps(doc))
+            # flush before the pair would push the chunk over the byte limit
+            if buf and len(buf) + len(pair) > max_chunk_bytes:
+                yield bytes(buf)
+                buf.clear()
+                count = 0
+            buf += pair
+            count += 1
+            if count >= chunk_size:
+                yield bytes(buf)
+                buf.clear()
+                count = 0
+        if buf:
+            yield bytes(buf)
+
+    def __send_bulk(self, body: bytes) -> List[Dict[str, Any]]:
+        """
+        Send a single NDJSON body to the `_bulk` endpoint and return the per-item results.
+        """
+        data, headers = self.__encode_body(body, "application/x-ndjson")
+        response = self.__request("POST", self._base_url_prefix + "_bulk", data=data, headers=headers)
+        response.raise_for_status()
+        data = loads(response.content)
+        return [next(iter(item.values())) for item in data.get("items", [])]
+
+    def bulk_index(
+        self,
+        index: str,
+        docs: Iterable[Dict[str, Any]],
+        chunk_size: int = 500,
+        max_chunk_bytes: int = 50 * 1024 * 1024,
+    ) -> List[Dict[str, Any]]:
+        """
+        Index many documents through the `_bulk` API.
+
+        Args:
+            index: The name of the index
+            docs: The documents to index. A document's "_id" key, if present, is
+                used as its ID and is not stored in the source.
+            chunk_size: The maximum number of documents per bulk request
+            max_chunk_bytes: The maximum size in bytes of a bulk request body
+
+        Returns:
+            list: The per-item results of every document that failed to index
+
+        Example:
+            failures = client.bulk_index("my_index", [{"_id": "1", "name": "a"}, {"name": "b"}])
+        """
+        failures = []
+        try:
+            for body in self.__bulk_chunks(index, docs, chunk_size, max_chunk_bytes):
+                failures.extend(result for result in self.__send_bulk(body) if "error" in result)
+        finally:
+            # earlier chunks may already be written even if a later one failed
+            self.invalidate(index)
+        return failures
+
+    def parallel_bulk(
+        self,
+        index: str,
+        docs: Iterable[Dict[str, Any]],
+        thread_count: int = 8,
+        queue_size: int = 4,
+        chunk_size: int = 500,
+        max_chunk_bytes: int = 50 * 1024 * 1024,
+    ) -> Iterator[Tuple[bool, Dict[str, Any]]]:
+        """
+        Index many documents through the `_bulk` API using several threads that
+        share the client session. Each chunk is dispatched as soon as it is full,
+        and at most thread_count + queue_size chunks are held in memory at once.
+
+        Args:
+            index: The name of the index
+            docs: The documents to index. A document's "_id" key, if present, is
+                used as its ID and is not stored in the source.
+            thread_count: The number of concurrent bulk requests
+            queue_size: The number of encoded chunks allowed to wait for a free thread
+            chunk_size: The maximum number of documents per bulk request
+            max_chunk_bytes: The maximum size in bytes of a bulk request body
+
+        Returns:
+            generator: Yields an (ok, info) tuple for every document, where info is
+                the per-item result from Elasticsearch
+
+        Example:
+            for ok, info in client.parallel_bulk("my_index", docs, thread_count=4):
+                if not ok:
+                    print(info)
+        """
+        def results(futures):
+            for future in futures:
+                for result in future.result():
+                    yield "error" not in result, result
+
+        pending = set()
+        try:
+            with ThreadPoolExecutor(max_workers=thread_count) as executor:
+                for body in self.__bulk_chunks(index, docs, chunk_size, max_chunk_bytes):
+                    if len(pending) >= thread_count + queue_size:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        yield from results(done)
+                    pending.add(executor.submit(self.__send_bulk, body))
+                yield from results(as_completed(pending))
+        finally:
+            # also runs when a chunk fails or the consumer stops iterating early
+            self.invalidate(index)
+
     def index_exists(self, index: str) -> bool:
         """
         Check if an index exists in Elasticsearch.
@@ -165,11 +631,12 @@ class ElasticsearchClient:
         Returns:
             requests.Response: The response from Elasticsearch
         """
-        return self.delete(f"{index}")
+        response = self.delete(f"{index}")
+        self.invalidate(index)
+        return response
 
-    @classmethod
     def create_point_in_time(
-        cls, endpoint=None, index=None, base_url=None, keep_alive=None, **kwargs
+        self, endpoint=None, index=None, base_url=None, keep_alive=None, **kwargs
     ):
         """
         This method creates a PIT for an Elasticsearch index, which allows for consistent search results 
@@ -179,7 +646,7 @@ class ElasticsearchClient:
             endpoint (str, optional): The endpoint to create the PIT. If provided, it will be used directly.
             index (str, optional): The name of the Elasticsearch index for which to create the PIT.
             base_url (str, optional): The base URL of the Elasticsearch instance. If not provided, 
-                                        the class-level base_url will be used.
+                                        the client base_url will be used.
             keep_alive (str, optional): The duration for which the PIT should be kept alive. Defaults to "1m".
             **kwargs: Additional keyword arguments.
         Returns:
@@ -188,27 +655,26 @@ class ElasticsearchClient:
             ValueError: If neither 'endpoint' nor 'index' and 'base_url' are provided.
         Example:
             # Using endpoint
-            response = ElasticClient.create_point_in_time(endpoint="/my_custom_endpoint")
+            response = client.create_point_in_time(endpoint="/my_custom_endpoint")
             # Using index
-            response = ElasticClient.create_point_in_time(index="my_index")
+            response = client.create_point_in_time(index="my_index")
             # Using index and base_url
-            response = ElasticClient.create_point_in_time(index="my_index", base_url="http://localhost:9200")
+            response = client.create_point_in_time(index="my_index", base_url="http://localhost:9200")
         """
         if endpoint:
-            return cls.__send_request("post", endpoint)
+            return self.__send_request("post", endpoint)
         # if any is none in index, base_url rais error
         if not index:
             raise ValueError(
                 "Either 'endpoint' or 'index' and 'base_url'  must be provided"
             )
-        base_url = base_url or cls.base_url
-
         keep_alive = keep_alive or "1m"
-        url = f"{base_url}/{index}/_search/point_in_time?keep_alive={keep_alive}"
-        return cls.__send_request("post", url)
+        url = f"{index}/_search/point_in_time?keep_alive={keep_alive}"
+        if base_url:
+            url = f"{base_url.rstrip('/')}/{url}"
+        return self.__send_request("post", url)
 
-    @classmethod
-    def delete_point_in_time(cls, pit_id):
+    def delete_point_in_time(self, pit_id):
         """
         This method deletes a Point in Time (PIT) in Elasticsearch to release resources.
         
@@ -220,22 +686,38 @@ class ElasticsearchClient:
             
         Example:
             # Delete a single point in time
-            response = ElasticsearchClient.delete_point_in_time(pit_id="my_pit_id")
+            response = client.delete_point_in_time(pit_id="my_pit_id")
             
             # Delete multiple points in time
-            response = ElasticsearchClient.delete_point_in_time(pit_id=["pit_id_1", "pit_id_2"])
+            response = client.delete_point_in_time(pit_id=["pit_id_1", "pit_id_2"])
         """
-        url = f"{cls.base_url}/_search/point_in_time"
+        url = "_search/point_in_time"
         
         # Convert single pit_id to a list for consistent processing
         pit_ids = [pit_id] if isinstance(pit_id, str) else pit_id
         
         body = {"pit_id": pit_ids}
-        return cls.__send_request("delete", url, data=body)
+        return self.__send_request("delete", url, data=body)
+
+    @staticmethod
+    def __iter_hits(response: requests.Response) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over the hits of a search response. When ijson is installed the
+        streamed body is parsed incrementally, so the full response tree is never
+        held in memory.
+        """
+        if ijson is None or getattr(response, "raw", None) is None:
+            yield from loads(response.content).get("hits", {}).get("hits", [])
+            return
+        # let urllib3 undo any gzip content encoding before parsing
+        response.raw.decode_content = True
+        try:
+            yield from ijson.items(response.raw, "hits.hits.item", use_float=True)
+        finally:
+            response.close()
 
-    @classmethod
     def search_with_pit(
-        cls,
+        self,
         pit_id: str,
         query,
         batch_size=10000,
@@ -249,40 +731,40 @@ class ElasticsearchClient:
             total_fetched = 0
             search_after = initial_search_after
 
-            while total_fetched < max_records:
-                body = {
-                    "track_total_hits": True,
-                    "query": query,
-                    "pit": {"id": pit_id, "keep_alive": "1m"},
-                    "size": min(batch_size, max_records - total_fetched),
-                    "sort": [{"timestamp": {"order": "desc"}}],
-                }
-                
-                if fields:
-                    body["_source"] = fields
+            # the static part of the body is built once, only size and search_after change per batch
+            body = {
+                "track_total_hits": True,
+                "query": query,
+                "pit": {"id": pit_id, "keep_alive": "1m"},
+                "sort": [{"timestamp": {"order": "desc"}}],
+            }
+            if fields:
+                body["_source"] = fields
 
+            while total_fetched < max_records:
+                body["size"] = min(batch_size, max_records - total_fetched)
                 if search_after:
                     body["search_after"] = search_after
 
-                response = cls.__send_request(
-                    "post", f"{cls.base_url}/_search", data=body
+                response = self.__send_request(
+                    "post", "_search", data=body, stream=ijson is not None and self._hx is None
                 )
                 if response.status_code != 200:
                     # import json
                     # print(json.dumps(body))
                     print(response.json())
                 response.raise_for_status()
-                data = response.json()
 
-                hits = data.get("hits", {}).get("hits", [])
-                if not hits:
-                    break
-
-                for hit in hits:
-                    yield (hit["_source"], hits[-1]["sort"])
+                fetched = 0
+                for hit in self.__iter_hits(response):
+                    # each hit carries its own sort value, the last one is where the next batch starts
+                    search_after = hit["sort"]
+                    fetched += 1
+                    yield (hit["_source"], search_after)
 
-                total_fetched += len(hits)
-                search_after = hits[-1]["sort"]
+                if not fetched:
+                    break
+                total_fetched += fetched
 
         if return_generator:
             return generator()
@@ -1,3 +1,5 @@
+import sys
+
 
 class ElasticUrls:
     """
@@ -18,11 +20,13 @@ class ElasticUrls:
     def __init__(self, index_name, base_url) -> None:
         self.__index_name = index_name
         self.__base_url = base_url
-        self.add = self.generate_url(f"{self.__index_name}/_doc", base_url)
-        self.search = self.generate_url(f"{self.__index_name}/_search", base_url)
-        self.update_by_query = self.generate_url(f"{self.__index_name}/_update_by_query", base_url)
-        self.delete_by_query = self.generate_url(f"{self.__index_name}/_delete_by_query", base_url)
-        self.indicies =  self.generate_url("_aliases?pretty=true", base_url)
+        # the index prefix is shared by every endpoint, build it once
+        self._prefix = sys.intern(f"{base_url.rstrip('/')}/{str(index_name).lstrip('/')}")
+        self.add = f"{self._prefix}/_doc"
+        self.search = f"{self._prefix}/_search"
+        self.update_by_query = f"{self._prefix}/_update_by_query"
+        self.delete_by_query = f"{self._prefix}/_delete_by_query"
+        self.indicies = self.generate_url("_aliases?pretty=true", base_url)
 
     def document(self, document_id) -> str:
         """
@@ -32,7 +36,7 @@ class ElasticUrls:
         Returns:
             str: the document url
         """
-        return self.generate_url(f"{self.__index_name}/_doc/{document_id}", self.__base_url)
+        return f"{self._prefix}/_doc/{document_id}"
     
     def point_in_time_url(self, keep_alive: str) -> str:
         """
@@ -42,4 +46,4 @@ class ElasticUrls:
         Returns:
             str: The point in time url
         """
-        return self.generate_url(f"{self.__index_name}/_search/point_in_time?keep_alive={keep_alive}", self.__base_url)
+        return f"{self._prefix}/_search/point_in_time?keep_alive={keep_alive}"
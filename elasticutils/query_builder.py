@@ -1,4 +1,11 @@
-import json
+from ._json import dumps
+
+# predicates that do not need scoring, these are routed from must to the cached filter context
+FILTERABLE_QUERIES = frozenset({"term", "terms", "range", "exists"})
+_VALID_SORT = frozenset({"desc", "asc"})
+_VALID_AGGS_TYPE = frozenset({"terms", "date_histogram", "top_hits", "cardinality"})
+_VALID_SORT_ON = frozenset({"_count", "_key"})
+
 # QueryBuilderException
 class QueryBuilderException(Exception):
     def __init__(self, message):
@@ -10,123 +17,63 @@ class ElasticQueryBuilder:
         self.index = index
         self.query = {"query": {}}
         self._aggs_count = 0
+        # the innermost aggregation body, nested aggregations are attached here
+        self._aggs_tail = None
         self.current_query_type = None
+        self._scored = False
 
     def __is_using_multi_conditional_query(self):
-        return "bool" in self.query["query"].keys()
+        return "bool" in self.query["query"]
 
-    def match(self, field: str, value):
-        #  check if bool exist in query['query']
-        KEY = "match"
-        if self.__is_using_multi_conditional_query():
-            self.query["query"]["bool"].setdefault(self.current_query_type, []).append(
-                {KEY: {field: value}}
-            )
+    def __clause_for(self, key: str) -> str:
+        # term level predicates under must are moved to filter so Elasticsearch can cache them
+        if self.current_query_type == "must" and not self._scored and key in FILTERABLE_QUERIES:
+            return "filter"
+        return self.current_query_type
+
+    def __add_predicate(self, key: str, payload, standalone_payload=None):
+        """
+        Add a predicate to the current bool clause, or use it as the whole query
+        when no bool query is being built. standalone_payload overrides payload
+        in the latter case.
+        """
+        query = self.query["query"]
+        if "bool" in query:
+            query["bool"].setdefault(self.__clause_for(key), []).append({key: payload})
+        elif query:
+            # any other key in query['query'] cannot be combined without bool
+            raise QueryBuilderException(f"Cannot use {key} query")
         else:
-            # if any other key exists in query['query'] then raise error
-            if len(self.query["query"].keys()) > 0:
-                raise QueryBuilderException(f"Cannot use {KEY} query")
-            self.query["query"][KEY] = {field: value}
+            query[key] = payload if standalone_payload is None else standalone_payload
         return self
 
+    def match(self, field: str, value):
+        return self.__add_predicate("match", {field: value})
+
     def match_phrase(self, field: str, value):
-        #  check if bool exist in query['query']
-        KEY = "match_phrase"
-        if self.__is_using_multi_conditional_query():
-            self.query["query"]["bool"].setdefault(self.current_query_type, []).append(
-                {KEY: {field: value}}
-            )
-        else:
-            # if any other key exists in query['query'] then raise error
-            if len(self.query["query"].keys()) > 0:
-                raise QueryBuilderException(f"Cannot use {KEY} query")
-            self.query["query"][KEY] = {field: value}
-        return self
+        return self.__add_predicate("match_phrase", {field: value})
 
     def term(self, field: str, value):
-        #  check if bool exist in query['query']
-        KEY = "term"
-        if self.__is_using_multi_conditional_query():
-            self.query["query"]["bool"].setdefault(self.current_query_type, []).append(
-                {KEY: {field: value}}
-            )
-        else:
-            # if any other key exists in query['query'] then raise error
-            if len(self.query["query"].keys()) > 0:
-                raise QueryBuilderException(f"Cannot use {KEY} query")
-            self.query["query"][KEY] = {field: {"value": value}}
-        return self
+        return self.__add_predicate("term", {field: value}, {field: {"value": value}})
     
     def terms(self, field: str, values):
-        #  check if bool exist in query['query']
-        KEY = "terms"
-        if self.__is_using_multi_conditional_query():
-            self.query["query"]["bool"].setdefault(self.current_query_type, []).append(
-                {KEY: {field: values}}
-            )
-        else:
-            # if any other key exists in query['query'] then raise error
-            if len(self.query["query"].keys()) > 0:
-                raise QueryBuilderException(f"Cannot use {KEY} query")
-            self.query["query"][KEY] = {field: values}
-        return self
+        return self.__add_predicate("terms", {field: values})
     
     def query_string(self, field: str, value):
-        #  check if bool exist in query['query']
-        KEY = "query_string"
-        if self.__is_using_multi_conditional_query():
-            self.query["query"]["bool"].setdefault(self.current_query_type, []).append(
-                {
-                    KEY: {
-                        "default_field": field,
-                        "query": value
-                    }
-                }
-            )
-        else:
-            # if any other key exists in query['query'] then raise error
-            if len(self.query["query"].keys()) > 0:
-                raise QueryBuilderException(f"Cannot use {KEY} query")
-            self.query["query"][KEY] = {
-                        "default_field": field,
-                        "query": value
-                    }
-        return self
+        return self.__add_predicate("query_string", {"default_field": field, "query": value})
 
     def range(self, field: str, gte=None, lte=None):
-        #  check if bool exist in query['query']
-        KEY = "range"
-        data = {field: {}}
-        if gte is not None:
-            data[field]["gte"] = gte
-        if lte is not None:
-            data[field]["lte"] = lte
         if gte is None and lte is None:
             raise QueryBuilderException("Must provide either gte or lte")
-        if self.__is_using_multi_conditional_query():
-            self.query["query"]["bool"].setdefault(self.current_query_type, []).append(
-                {KEY: data}
-            )
-        else:
-            # if any other key exists in query['query'] then raise error
-            if len(self.query["query"].keys()) > 0:
-                raise QueryBuilderException(f"Cannot use {KEY} query")
-            self.query["query"][KEY] = data
-        return self
+        data = {}
+        if gte is not None:
+            data["gte"] = gte
+        if lte is not None:
+            data["lte"] = lte
+        return self.__add_predicate("range", {field: data})
     
     def exists(self, field: str):
-        #  check if bool exist in query['query']
-        KEY = "exists"
-        if self.__is_using_multi_conditional_query():
-            self.query["query"]["bool"].setdefault(self.current_query_type, []).append(
-                {KEY: {"field": field}}
-            )
-        else:
-            # if any other key exists in query['query'] then raise error
-            if len(self.query["query"].keys()) > 0:
-                raise QueryBuilderException(f"Cannot use {KEY} query")
-            self.query["query"][KEY] = {"field": field}
-        return self
+        return self.__add_predicate("exists", {"field": field})
 
     def add_bool(self, sub_query):
         if not isinstance(sub_query, ElasticQueryBuilder):
@@ -137,7 +84,7 @@ class ElasticQueryBuilder:
         query = sub_query.build()
         if not query:
             raise QueryBuilderException("sub_query must contain query")
-        if "bool" not in query["query"].keys():
+        if "bool" not in query["query"]:
             raise QueryBuilderException("sub_query must contain bool query")
         self.query["query"]["bool"].setdefault(self.current_query_type, []).append(
             query["query"]
@@ -147,7 +94,7 @@ class ElasticQueryBuilder:
     def __setup_multi_conditional_query(self, query_type: str):
         if not self.__is_using_multi_conditional_query():
             # if any other key exists in query['query'] then raise error
-            if len(self.query["query"].keys()) > 0:
+            if self.query["query"]:
                 raise QueryBuilderException(
                     f"Cannot use {query_type} conditional query"
                 )
@@ -164,8 +111,25 @@ class ElasticQueryBuilder:
         return self
 
     def must(self):
+        """
+        Add the following predicates to the must clause. term, terms, range and
+        exists predicates are placed in the filter clause instead, since they
+        match the same documents there and can be served from the filter cache.
+        Use scored() to keep them in must.
+        """
+        self.__setup_multi_conditional_query("must")
+        self.current_query_type = "must"
+        self._scored = False
+        return self
+
+    def scored(self):
+        """
+        Add the following predicates to the must clause, including term, terms,
+        range and exists predicates, so they contribute to the score.
+        """
         self.__setup_multi_conditional_query("must")
         self.current_query_type = "must"
+        self._scored = True
         return self
 
     def must_not(self):
@@ -204,11 +168,11 @@ class ElasticQueryBuilder:
     def __aggs_by_type(self, field: str, *args, **kwargs):
         def get(key: str, default):
             value = kwargs.get(key, default)
-            if key == "sort" and value not in ["desc", "asc"]:
+            if key == "sort" and value not in _VALID_SORT:
                 raise QueryBuilderException("sort must be either desc or asc")
-            if key == "aggs_type" and value not in ["terms", "date_histogram", "top_hits", "cardinality"]:
+            if key == "aggs_type" and value not in _VALID_AGGS_TYPE:
                 raise QueryBuilderException("aggs_type must be either terms, date_histogram, top_hits, or cardinality")
-            if key == "sort_on" and value not in ['_count', '_key']:
+            if key == "sort_on" and value not in _VALID_SORT_ON:
                 raise QueryBuilderException("sort_on must be either _count or _key")
             return value
 
@@ -240,9 +204,9 @@ class ElasticQueryBuilder:
             self: The QueryBuilder instance.
 
         """
-        if len(args) > 0 and "size" not in kwargs.keys():
+        if len(args) > 0 and "size" not in kwargs:
             kwargs['size'] = args[0]
-        if len(args) > 1 and "sort" not in kwargs.keys():
+        if len(args) > 1 and "sort" not in kwargs:
             kwargs['sort'] = args[1]
             
         agg = {
@@ -251,11 +215,8 @@ class ElasticQueryBuilder:
         if self._aggs_count == 0:
             self.query["aggs"] = agg
         else:
-            # find the last aggs
-            parent = self.query
-            for _ in range(self._aggs_count):
-                parent = parent["aggs"]["data"]
-            parent["aggs"] = agg
+            self._aggs_tail["aggs"] = agg
+        self._aggs_tail = agg["data"]
         self._aggs_count += 1
         return self
     
@@ -270,17 +231,17 @@ class ElasticQueryBuilder:
         return self
 
     def sort(self, field: str, order: str = "desc"):
-        if order not in ["desc", "asc"]:
+        if order not in _VALID_SORT:
             raise QueryBuilderException("order must be either desc or asc")
         self.query.setdefault("sort", []).append({field: {"order": order}})
         return self
 
     def print(self):
-        print(json.dumps(self.query))
+        print(dumps(self.query).decode())
         return self
 
     def build(self):
-        # check if query is empty
-        if not self.query["query"]:
+        # check if query is empty, it may already have been removed by an earlier build
+        if "query" in self.query and not self.query["query"]:
             self.query.pop("query")
         return self.query
\ No newline at end of file
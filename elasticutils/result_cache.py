@@ -0,0 +1,74 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from ._json import dumps
+
+
+class ResultCache:
+    """
+    A thread-safe LRU cache with a time-to-live, used by ElasticsearchClient to
+    serve repeated searches and document lookups without a round-trip.
+
+    Example:
+        client = ElasticsearchClient(base_url, username, password, result_cache=ResultCache(maxsize=1024, ttl=60.0))
+    """
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(index: str, *parts) -> bytes:
+        """
+        Build a cache key from an index and any JSON serializable parts. Dict keys
+        are sorted so that queries differing only in key order share an entry.
+        Args:
+            index (str): The name of the index
+            *parts: The query, document id or other values identifying the request
+        Returns:
+            bytes: The cache key
+        """
+        return hashlib.blake2b(dumps([index, *parts], sort_keys=True), digest_size=16).digest()
+
+    def get(self, key: bytes) -> Optional[Any]:
+        """
+        Get a cached value, or None if it is missing or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            _, expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: bytes, index: str, value: Any) -> None:
+        """
+        Store a value for the given key, evicting the least recently used entry if full.
+        """
+        with self._lock:
+            self._entries[key] = (index, time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, index: Optional[str] = None) -> None:
+        """
+        Drop every entry cached for the given index, or all entries if index is None.
+        """
+        with self._lock:
+            if index is None:
+                self._entries.clear()
+                return
+            for key in [key for key, entry in self._entries.items() if entry[0] == index]:
+                del self._entries[key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
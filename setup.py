@@ -9,5 +9,11 @@ setup(
     install_requires=[
         "requests"
     ],
+    extras_require={
+        "async": ["aiohttp"],
+        "fast": ["orjson"],
+        "stream": ["ijson"],
+        "http2": ["httpx[http2]"],
+    },
     python_requires=">=3.7",
 )
\ No newline at end of file
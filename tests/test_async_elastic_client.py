@@ -0,0 +1,50 @@
+import unittest
+
+from elasticutils import AsyncElasticsearchClient
+
+try:
+    import aiohttp
+    from aiohttp import web
+    from aiohttp.test_utils import TestServer
+except ImportError:
+    aiohttp = None
+
+
+async def get_doc(request):
+    doc_id = request.match_info["doc_id"]
+    if doc_id == "missing":
+        return web.json_response({"_index": "idx", "_id": doc_id, "found": False}, status=404)
+    return web.json_response({"_index": "idx", "_id": doc_id, "found": True, "_source": {"name": "a"}})
+
+
+async def search(request):
+    return web.json_response({"error": {"type": "index_not_found_exception"}, "status": 404}, status=404)
+
+
+@unittest.skipUnless(aiohttp is not None, "aiohttp is not installed")
+class AsyncElasticsearchClientTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        app = web.Application()
+        app.router.add_get("/{index}/_doc/{doc_id}", get_doc)
+        app.router.add_post("/{index}/_search", search)
+        self.server = TestServer(app)
+        await self.server.start_server()
+        self.client = AsyncElasticsearchClient(str(self.server.make_url("/")), "user", "pass")
+        await self.client.__aenter__()
+
+    async def asyncTearDown(self):
+        await self.client.close()
+        await self.server.close()
+
+    async def test_get_document(self):
+        doc = await self.client.get_document("idx", "1")
+        self.assertEqual(doc["_source"], {"name": "a"})
+
+    async def test_get_missing_document(self):
+        doc = await self.client.get_document("idx", "missing")
+        self.assertEqual(doc, {"_index": "idx", "_id": "missing", "found": False})
+
+    async def test_search_raises_on_error_status(self):
+        with self.assertRaises(aiohttp.ClientResponseError) as ctx:
+            await self.client.search("missing", {"query": {"match_all": {}}})
+        self.assertEqual(ctx.exception.status, 404)
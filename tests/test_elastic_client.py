@@ -0,0 +1,297 @@
+import gzip
+import io
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+import certifi
+import requests
+import urllib3
+
+from elasticutils import ElasticQueryBuilder, ElasticsearchClient, ResultCache
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+
+def make_response(body, status_code=200):
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = json.dumps(body).encode()
+    response._content_consumed = True
+    return response
+
+
+def make_streamed_response(body):
+    # a gzip encoded body that is only readable through response.raw, like a stream=True response
+    response = requests.Response()
+    response.status_code = 200
+    response.raw = urllib3.HTTPResponse(
+        body=io.BytesIO(gzip.compress(json.dumps(body).encode())),
+        headers={"Content-Encoding": "gzip"},
+        status=200,
+        preload_content=False,
+    )
+    return response
+
+
+def parse_ndjson(body: bytes):
+    lines = body.decode().strip().split("\n")
+    return [(json.loads(lines[i]), json.loads(lines[i + 1])) for i in range(0, len(lines), 2)]
+
+
+def bulk_handler(method, url, data=None, headers=None, **kwargs):
+    # documents with "bad": true are reported as failed items
+    items = []
+    for action, doc in parse_ndjson(data):
+        result = {"_id": action["index"].get("_id"), "status": 201}
+        if doc.get("bad"):
+            result.update(status=400, error={"type": "mapper_parsing_exception"})
+        items.append({"index": result})
+    return make_response({"errors": any("error" in item["index"] for item in items), "items": items})
+
+
+class StatusHandler(BaseHTTPRequestHandler):
+    # every request is answered with the server's status and counted per method
+    def handle_request(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.server.attempts[self.command] += 1
+        body = b"{}"
+        self.send_response(self.server.status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = handle_request
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ElasticsearchClientTest(unittest.TestCase):
+    def setUp(self):
+        # bodies are never gzipped so the mocked session can read them directly
+        self.client = ElasticsearchClient("http://localhost:9200/", "user", "pass", compress_threshold=None)
+        self.request = mock.Mock()
+        self.client._session.request = self.request
+
+    def bulk_chunks(self, docs, chunk_size=500, max_chunk_bytes=50 * 1024 * 1024):
+        return list(self.client._ElasticsearchClient__bulk_chunks("idx", docs, chunk_size, max_chunk_bytes))
+
+    def test_bulk_chunks_flush_on_document_count(self):
+        chunks = self.bulk_chunks([{"n": i} for i in range(7)], chunk_size=3)
+        self.assertEqual([len(parse_ndjson(chunk)) for chunk in chunks], [3, 3, 1])
+
+    def test_bulk_chunks_flush_on_byte_size(self):
+        docs = [{"text": "x" * 100} for _ in range(5)]
+        pair_size = len(self.bulk_chunks(docs[:1])[0])
+        chunks = self.bulk_chunks(docs, max_chunk_bytes=pair_size * 2)
+        self.assertEqual([len(parse_ndjson(chunk)) for chunk in chunks], [2, 2, 1])
+        self.assertTrue(all(len(chunk) <= pair_size * 2 for chunk in chunks))
+
+    def test_bulk_chunks_never_exceed_byte_limit(self):
+        docs = [{"text": "x" * 900} for _ in range(5)]
+        chunks = self.bulk_chunks(docs, max_chunk_bytes=1000)
+        # each pair is just under the limit, so two never fit in one chunk
+        self.assertEqual([len(parse_ndjson(chunk)) for chunk in chunks], [1, 1, 1, 1, 1])
+        self.assertTrue(all(len(chunk) <= 1000 for chunk in chunks))
+
+        pair_size = len(self.bulk_chunks(docs[:1])[0])
+        chunks = self.bulk_chunks(docs, max_chunk_bytes=pair_size * 2 + pair_size // 2)
+        self.assertEqual([len(parse_ndjson(chunk)) for chunk in chunks], [2, 2, 1])
+
+    def test_bulk_chunks_send_oversized_document_alone(self):
+        docs = [{"n": 1}, {"text": "x" * 2000}, {"n": 2}]
+        chunks = self.bulk_chunks(docs, max_chunk_bytes=1000)
+        self.assertEqual([pair[1] for chunk in chunks for pair in parse_ndjson(chunk)], docs)
+        self.assertEqual([len(parse_ndjson(chunk)) for chunk in chunks], [1, 1, 1])
+
+    def test_bulk_chunks_extract_id(self):
+        doc = {"_id": "1", "name": "a"}
+        chunk = self.bulk_chunks([doc, {"_id": None, "name": "b"}, {"name": "c"}])[0]
+        pairs = parse_ndjson(chunk)
+        self.assertEqual(pairs[0], ({"index": {"_index": "idx", "_id": "1"}}, {"name": "a"}))
+        self.assertEqual(pairs[1], ({"index": {"_index": "idx"}}, {"name": "b"}))
+        self.assertEqual(pairs[2], ({"index": {"_index": "idx"}}, {"name": "c"}))
+        # the caller's document is not modified
+        self.assertEqual(doc, {"_id": "1", "name": "a"})
+
+    def test_bulk_index_returns_failures(self):
+        self.request.side_effect = bulk_handler
+        docs = [{"_id": str(i), "bad": i % 4 == 0} for i in range(10)]
+        failures = self.client.bulk_index("idx", docs, chunk_size=3)
+        self.assertEqual(sorted(failure["_id"] for failure in failures), ["0", "4", "8"])
+        self.assertEqual(self.request.call_count, 4)
+        method, url = self.request.call_args.args
+        self.assertEqual((method, url), ("POST", "http://localhost:9200/_bulk"))
+        self.assertEqual(self.request.call_args.kwargs["headers"]["Content-Type"], "application/x-ndjson")
+
+    def test_parallel_bulk_results(self):
+        self.request.side_effect = bulk_handler
+        docs = [{"_id": str(i), "bad": i % 7 == 0} for i in range(103)]
+        results = list(self.client.parallel_bulk("idx", iter(docs), thread_count=3, queue_size=1, chunk_size=10))
+        self.assertEqual(len(results), 103)
+        self.assertEqual(self.request.call_count, 11)
+        self.assertEqual(sorted(info["_id"] for ok, info in results), sorted(doc["_id"] for doc in docs))
+        failed = {info["_id"] for ok, info in results if not ok}
+        self.assertEqual(failed, {str(i) for i in range(0, 103, 7)})
+
+    def test_bulk_invalidates_cache_when_a_chunk_fails(self):
+        self.client.result_cache = ResultCache()
+        self.client.result_cache.set(b"key", "idx", b"{}")
+        self.request.side_effect = [bulk_handler("POST", "", data=self.bulk_chunks([{"n": 1}])[0]), make_response({}, 500)]
+        with self.assertRaises(requests.HTTPError):
+            self.client.bulk_index("idx", [{"n": 1}, {"n": 2}], chunk_size=1)
+        self.assertEqual(len(self.client.result_cache), 0)
+
+    def test_get_document_cache_returns_copies(self):
+        self.client.result_cache = ResultCache()
+        self.request.return_value = make_response({"_id": "1", "_source": {"name": "a"}})
+        first = self.client.get_document("idx", "1")
+        first["_source"]["name"] = "changed"
+        second = self.client.get_document("idx", "1")
+        self.assertEqual(second["_source"]["name"], "a")
+        self.assertEqual(self.request.call_count, 1)
+
+    def test_get_many_preserves_order(self):
+        def mget_handler(method, url, data=None, headers=None, **kwargs):
+            ids = json.loads(data)["ids"]
+            return make_response({"docs": [{"_id": doc_id, "found": True} for doc_id in ids]})
+
+        self.request.side_effect = mget_handler
+        doc_ids = [str(i) for i in range(2500)]
+        docs = self.client.get_many("idx", doc_ids, chunk=300, thread_count=4)
+        self.assertEqual([doc["_id"] for doc in docs], doc_ids)
+        self.assertEqual(self.request.call_count, 9)
+        self.assertEqual(self.client.get_many("idx", []), [])
+        self.assertEqual(self.request.call_count, 9)
+
+    def test_mget_source_parameter(self):
+        self.request.return_value = make_response({"docs": []})
+        for source, url in [
+            ("name", "http://localhost:9200/idx/_mget?_source=name"),
+            (["a", "b"], "http://localhost:9200/idx/_mget?_source=a,b"),
+            (False, "http://localhost:9200/idx/_mget?_source=false"),
+            (None, "http://localhost:9200/idx/_mget"),
+        ]:
+            self.client.mget("idx", ["1"], _source=source)
+            self.assertEqual(self.request.call_args.args[1], url)
+
+    def test_credentials_required(self):
+        with self.assertRaises(ValueError):
+            ElasticsearchClient("http://localhost:9200")
+        client = ElasticsearchClient.from_token("http://localhost:9200", "dG9rZW4=")
+        self.assertEqual(client.headers["Authorization"], "Basic dG9rZW4=")
+
+    def test_ca_bundle_is_not_reloaded_per_connection(self):
+        client = ElasticsearchClient("https://localhost:9200", "user", "pass", ca_bundle=certifi.where())
+        adapter = client._session.get_adapter("https://localhost:9200")
+        self.assertIs(adapter.verify, True)
+        conn = mock.Mock()
+        adapter.cert_verify(conn, "https://localhost:9200", adapter.verify, None)
+        self.assertEqual(conn.cert_reqs, "CERT_REQUIRED")
+        self.assertIsNone(conn.ca_certs)
+        self.assertIsNone(conn.ca_cert_dir)
+
+    def test_search_request_cache_default(self):
+        self.request.return_value = make_response({"hits": {"hits": []}})
+        url = "http://localhost:9200/idx/_search"
+        for query, expected in [
+            ({"size": 0, "query": {"match_all": {}}}, url + "?request_cache=true"),
+            (ElasticQueryBuilder().aggs("field").build(), url + "?request_cache=true"),
+            ({"aggregations": {"a": {}}, "query": {}}, url + "?request_cache=true"),
+            ({"aggs": {"a": {}}, "query": {"term": {"f": "v"}}}, url),
+            ({"query": {"match_all": {}}}, url),
+        ]:
+            with self.subTest(query=query):
+                self.client.search("idx", query, cache=False)
+                self.assertEqual(self.request.call_args.args[1], expected)
+        self.client.search("idx", {"aggs": {"a": {}}}, cache=False, request_cache=False)
+        self.assertEqual(self.request.call_args.args[1], url + "?request_cache=false")
+
+    def check_search_with_pit(self, make):
+        def hit(n):
+            return {"_source": {"n": n}, "sort": [1000 - n, "id%d" % n]}
+
+        batches = [
+            {"hits": {"total": {"value": 5}, "hits": [hit(0), hit(1)]}},
+            {"hits": {"total": {"value": 5}, "hits": [hit(2), hit(3)]}},
+            {"hits": {"total": {"value": 5}, "hits": [hit(4)]}},
+            {"hits": {"total": {"value": 5}, "hits": []}},
+        ]
+        bodies = []
+
+        def handler(method, url, data=None, headers=None, **kwargs):
+            body = json.loads(data)
+            bodies.append(body)
+            batch = batches[len(bodies) - 1]
+            return make({"hits": dict(batch["hits"], hits=batch["hits"]["hits"][:body["size"]])})
+
+        self.request.side_effect = handler
+        results = list(self.client.search_with_pit("pit", {"match_all": {}}, batch_size=2, return_generator=True))
+        self.assertEqual(results, [(hit(n)["_source"], hit(n)["sort"]) for n in range(5)])
+        # the loop stops after the first empty batch
+        self.assertEqual(len(bodies), 4)
+        self.assertNotIn("search_after", bodies[0])
+        self.assertEqual([body["search_after"] for body in bodies[1:]], [hit(1)["sort"], hit(3)["sort"], hit(4)["sort"]])
+
+        # and once max_records hits were fetched, without another request
+        bodies.clear()
+        results, search_after = self.client.search_with_pit("pit", {"match_all": {}}, batch_size=2, max_records=3)
+        self.assertEqual(results, [hit(n)["_source"] for n in range(3)])
+        self.assertEqual(search_after, hit(2)["sort"])
+        self.assertEqual([body["size"] for body in bodies], [2, 1])
+        return self.request.call_args.kwargs["stream"]
+
+    @unittest.skipUnless(ijson is not None, "ijson is not installed")
+    def test_search_with_pit_streams_hits(self):
+        self.assertTrue(self.check_search_with_pit(make_streamed_response))
+
+    def test_search_with_pit_without_ijson(self):
+        with mock.patch("elasticutils.elastic_client.ijson", None):
+            self.assertFalse(self.check_search_with_pit(make_response))
+
+
+class RetryTest(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StatusHandler)
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+        self.url = "http://127.0.0.1:%d/" % self.server.server_address[1]
+        sleep = mock.patch("time.sleep")
+        sleep.start()
+        self.addCleanup(sleep.stop)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def check_attempts(self, client):
+        self.addCleanup(client.close)
+        for method, status, attempts in [("POST", 429, 4), ("POST", 503, 1), ("GET", 503, 4)]:
+            with self.subTest(method=method, status=status):
+                self.server.status = status
+                self.server.attempts = {"GET": 0, "POST": 0}
+                if method == "POST":
+                    response = client.post("idx/_search", data={"query": {}})
+                else:
+                    response = client.get("idx/_doc/1")
+                # the last response is returned once retries run out
+                self.assertEqual(response.status_code, status)
+                self.assertEqual(self.server.attempts[method], attempts)
+
+    def test_requests_transport(self):
+        self.check_attempts(ElasticsearchClient(self.url, "user", "pass"))
+
+    @unittest.skipUnless(httpx is not None, "httpx is not installed")
+    def test_http2_transport(self):
+        self.check_attempts(ElasticsearchClient(self.url, "user", "pass", http2=True))
@@ -0,0 +1,51 @@
+import importlib
+import json
+import sys
+import unittest
+from unittest import mock
+
+from elasticutils import _json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def load_backend(use_orjson: bool):
+    """
+    Reload elasticutils._json with or without orjson importable.
+    """
+    modules = {} if use_orjson else {"orjson": None}
+    with mock.patch.dict(sys.modules, modules):
+        return importlib.reload(_json)
+
+
+class JsonBackendTest(unittest.TestCase):
+    SAMPLES = [
+        {"name": "a", "nested": {"list": [1, 2.5, None, True]}},
+        {1: "int key", "text": "ü"},
+        {"big": 2 ** 70},
+        ("tuple", "values"),
+    ]
+
+    def tearDown(self):
+        importlib.reload(_json)
+
+    def check_backend(self, module):
+        for sample in self.SAMPLES:
+            with self.subTest(sample=sample):
+                expected = json.loads(json.dumps(sample))
+                self.assertEqual(module.loads(module.dumps(sample)), expected)
+        self.assertEqual(module.dumps({"b": 1, "a": {"d": 2, "c": 3}}, sort_keys=True), b'{"a":{"c":3,"d":2},"b":1}')
+
+    def test_stdlib_backend(self):
+        module = load_backend(use_orjson=False)
+        self.assertIsNone(module.orjson)
+        self.check_backend(module)
+
+    @unittest.skipUnless(orjson is not None, "orjson is not installed")
+    def test_orjson_backend(self):
+        module = load_backend(use_orjson=True)
+        self.assertIsNotNone(module.orjson)
+        self.check_backend(module)
@@ -0,0 +1,105 @@
+import unittest
+
+from elasticutils import ElasticQueryBuilder
+from elasticutils.query_builder import QueryBuilderException
+
+
+class ElasticQueryBuilderTest(unittest.TestCase):
+    def test_must_routes_term_level_predicates_to_filter(self):
+        query = (
+            ElasticQueryBuilder()
+            .must()
+            .term("status", "active")
+            .terms("tags", ["a", "b"])
+            .range("age", gte=18)
+            .exists("email")
+            .match("name", "john")
+            .build()
+        )
+        self.assertEqual(query, {"query": {"bool": {
+            "filter": [
+                {"term": {"status": "active"}},
+                {"terms": {"tags": ["a", "b"]}},
+                {"range": {"age": {"gte": 18}}},
+                {"exists": {"field": "email"}},
+            ],
+            "must": [{"match": {"name": "john"}}],
+        }}})
+
+    def test_scored_keeps_predicates_in_must(self):
+        query = ElasticQueryBuilder().scored().term("status", "active").range("age", lte=65).build()
+        self.assertEqual(query, {"query": {"bool": {"must": [
+            {"term": {"status": "active"}},
+            {"range": {"age": {"lte": 65}}},
+        ]}}})
+
+    def test_must_resets_scored(self):
+        query = ElasticQueryBuilder().scored().term("a", 1).must().term("b", 2).build()
+        self.assertEqual(query, {"query": {"bool": {
+            "must": [{"term": {"a": 1}}],
+            "filter": [{"term": {"b": 2}}],
+        }}})
+
+    def test_other_clauses_are_not_rerouted(self):
+        query = ElasticQueryBuilder().should().term("a", 1).must_not().exists("b").filter().match("c", "x").build()
+        self.assertEqual(query, {"query": {"bool": {
+            "should": [{"term": {"a": 1}}],
+            "must_not": [{"exists": {"field": "b"}}],
+            "filter": [{"match": {"c": "x"}}],
+        }}})
+
+    def test_standalone_predicates(self):
+        for builder, expected in [
+            (ElasticQueryBuilder().term("status", "active"), {"term": {"status": {"value": "active"}}}),
+            (ElasticQueryBuilder().terms("tags", ["a"]), {"terms": {"tags": ["a"]}}),
+            (ElasticQueryBuilder().match("name", "john"), {"match": {"name": "john"}}),
+            (ElasticQueryBuilder().match_phrase("name", "john doe"), {"match_phrase": {"name": "john doe"}}),
+            (ElasticQueryBuilder().query_string("name", "jo*"), {"query_string": {"default_field": "name", "query": "jo*"}}),
+            (ElasticQueryBuilder().range("age", gte=1, lte=2), {"range": {"age": {"gte": 1, "lte": 2}}}),
+            (ElasticQueryBuilder().exists("email"), {"exists": {"field": "email"}}),
+        ]:
+            with self.subTest(expected=expected):
+                self.assertEqual(builder.build(), {"query": expected})
+
+    def test_predicate_errors(self):
+        with self.assertRaises(QueryBuilderException):
+            ElasticQueryBuilder().range("age")
+        with self.assertRaises(QueryBuilderException):
+            ElasticQueryBuilder().term("a", 1).match("b", 2)
+        with self.assertRaises(QueryBuilderException):
+            ElasticQueryBuilder().term("a", 1).must()
+
+    def test_add_bool(self):
+        sub_query = ElasticQueryBuilder().should().match("a", 1).match("b", 2)
+        query = ElasticQueryBuilder().must().add_bool(sub_query).build()
+        self.assertEqual(query, {"query": {"bool": {"must": [
+            {"bool": {"should": [{"match": {"a": 1}}, {"match": {"b": 2}}]}},
+        ]}}})
+        with self.assertRaises(QueryBuilderException):
+            ElasticQueryBuilder().must().add_bool(ElasticQueryBuilder().term("a", 1))
+
+    def test_nested_aggs(self):
+        query = (
+            ElasticQueryBuilder()
+            .aggs("country", 5)
+            .aggs("timestamp", aggs_type="date_histogram", fixed_interval="1h")
+            .aggs("user", aggs_type="cardinality")
+            .build()
+        )
+        self.assertEqual(query, {"aggs": {"data": {
+            "terms": {"field": "country", "order": {"_count": "desc"}, "size": 5},
+            "aggs": {"data": {
+                "date_histogram": {"field": "timestamp", "fixed_interval": "1h"},
+                "aggs": {"data": {"cardinality": {"field": "user"}}},
+            }},
+        }}})
+
+    def test_aggs_errors(self):
+        for kwargs in [{"sort": "up"}, {"aggs_type": "avg"}, {"sort_on": "name"}]:
+            with self.subTest(kwargs=kwargs), self.assertRaises(QueryBuilderException):
+                ElasticQueryBuilder().aggs("field", **kwargs)
+
+    def test_build_can_be_called_twice(self):
+        builder = ElasticQueryBuilder().query_size(0).aggs("field")
+        self.assertEqual(builder.build(), builder.build())
+        self.assertNotIn("query", builder.build())
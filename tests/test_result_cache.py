@@ -0,0 +1,49 @@
+import unittest
+from unittest import mock
+
+from elasticutils import ResultCache
+
+
+class ResultCacheTest(unittest.TestCase):
+    def test_make_key_ignores_dict_order(self):
+        first = ResultCache.make_key("idx", "_search", {"a": 1, "b": {"c": 2, "d": 3}})
+        second = ResultCache.make_key("idx", "_search", {"b": {"d": 3, "c": 2}, "a": 1})
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, ResultCache.make_key("other", "_search", {"a": 1, "b": {"c": 2, "d": 3}}))
+
+    def test_entries_expire_after_ttl(self):
+        cache = ResultCache(ttl=10.0)
+        with mock.patch("elasticutils.result_cache.time.monotonic", return_value=100.0):
+            cache.set(b"key", "idx", "value")
+        with mock.patch("elasticutils.result_cache.time.monotonic", return_value=109.9):
+            self.assertEqual(cache.get(b"key"), "value")
+        with mock.patch("elasticutils.result_cache.time.monotonic", return_value=110.0):
+            self.assertIsNone(cache.get(b"key"))
+        self.assertEqual(len(cache), 0)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = ResultCache(maxsize=2)
+        cache.set(b"a", "idx", 1)
+        cache.set(b"b", "idx", 2)
+        # reading a makes b the least recently used entry
+        self.assertEqual(cache.get(b"a"), 1)
+        cache.set(b"c", "idx", 3)
+        self.assertIsNone(cache.get(b"b"))
+        self.assertEqual(cache.get(b"a"), 1)
+        self.assertEqual(cache.get(b"c"), 3)
+        self.assertEqual(len(cache), 2)
+
+    def test_invalidate_index(self):
+        cache = ResultCache()
+        cache.set(b"a", "first", 1)
+        cache.set(b"b", "second", 2)
+        cache.invalidate("first")
+        self.assertIsNone(cache.get(b"a"))
+        self.assertEqual(cache.get(b"b"), 2)
+
+    def test_invalidate_all(self):
+        cache = ResultCache()
+        cache.set(b"a", "first", 1)
+        cache.set(b"b", "second", 2)
+        cache.invalidate()
+        self.assertEqual(len(cache), 0)